@@ -1,18 +1,32 @@
 import os
 import sys
+from stat import S_IMODE
 import struct
+import mmap
+import re
+import shlex
 import subprocess
+import time
 import json  
+import hashlib
+import io
+import tempfile
+import threading
+import traceback
+import bisect
 import PyQt6
 from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QLabel, QColorDialog, QToolBar,
-    QVBoxLayout, QWidget, QDockWidget, QTableWidget, QTableWidgetItem,
+    QVBoxLayout, QWidget, QDockWidget, QTableView, QAbstractItemView,
     QHeaderView, QSizePolicy, QInputDialog, QListWidget, QListWidgetItem,
     QMessageBox 
 )
 from PyQt6.QtGui import QImage, QPixmap, QColor, QPalette, QAction
-from PyQt6.QtCore import Qt, QSize, QStandardPaths  
+from PyQt6.QtCore import (
+    Qt, QSize, QStandardPaths, QFileSystemWatcher, QTimer, QThreadPool, QRunnable,
+    QObject, pyqtSignal, QAbstractTableModel, QModelIndex, QCoreApplication
+)
 from PIL import Image
 
 
@@ -26,13 +40,17 @@ def resource_path(relative_path: str) -> str:
 
     return os.path.join(base_path, relative_path)
 
-def _config_path() -> str:
-    """Return a writable per-user config path (works in dev and PyInstaller)."""
+def _config_dir() -> str:
+    """Return a writable per-user config directory (works in dev and PyInstaller)."""
     base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppConfigLocation)
     if not base:
         base = os.path.expanduser("~/.ppainter")
     os.makedirs(base, exist_ok=True)
-    return os.path.join(base, "ppainter_config.json")
+    return base
+
+def _config_path() -> str:
+    """Return a writable per-user config path (works in dev and PyInstaller)."""
+    return os.path.join(_config_dir(), "ppainter_config.json")
 
 def load_config() -> dict:
     path = _config_path()
@@ -67,90 +85,108 @@ def load_tim(filepath):
     'data' is a 2D array: either palette indices or (r,g,b) tuples.
     """
     with open(filepath, 'rb') as f:
-        magic = f.read(4)
-        if magic != b'\x10\x00\x00\x00':
-            raise ValueError("Not a TIM file (invalid magic)")
-        flags = struct.unpack('<I', f.read(4))[0]
-        bpp_flag = flags & 3
-        clut_flag = bool(flags & 8)
-        bpp = {0:4, 1:8, 2:16, 3:24}.get(bpp_flag)
-        if bpp is None:
-            raise ValueError("Unsupported TIM bit depth")
-        clut = None
-        if clut_flag:
-            clut_len = struct.unpack('<I', f.read(4))[0]
-            ox, oy, w16, h16 = struct.unpack('<HHHH', f.read(8))
-            clut_bytes = f.read(clut_len - 12)
-            count = w16 * h16
-            clut = []
-            for i in range(count):
-                val = struct.unpack_from('<H', clut_bytes, i*2)[0]
-                r = (val & 0x1F); g = (val >> 5) & 0x1F; b = (val >> 10) & 0x1F
-                # Expand 5-bit to 8-bit
+        return parse_tim(f.read())
+
+class _Reader:
+    """Sequential reader over any bytes-like object (bytes, mmap, memoryview slice)."""
+    def __init__(self, buf):
+        self.buf = buf; self.pos = 0
+
+    def read(self, n):
+        chunk = self.buf[self.pos:self.pos+n]
+        self.pos += n
+        return chunk
+
+def parse_tim(buf):
+    """
+    Decode a TIM from a bytes-like object (see load_tim for the returned dict).
+    A memoryview slice works too, so embedded TIMs decode without copying the container.
+    """
+    f = _Reader(buf)
+    magic = bytes(f.read(4))
+    if magic != b'\x10\x00\x00\x00':
+        raise ValueError("Not a TIM file (invalid magic)")
+    flags = struct.unpack('<I', f.read(4))[0]
+    bpp_flag = flags & 3
+    clut_flag = bool(flags & 8)
+    bpp = {0:4, 1:8, 2:16, 3:24}.get(bpp_flag)
+    if bpp is None:
+        raise ValueError("Unsupported TIM bit depth")
+    clut = None
+    if clut_flag:
+        clut_len = struct.unpack('<I', f.read(4))[0]
+        ox, oy, w16, h16 = struct.unpack('<HHHH', f.read(8))
+        clut_bytes = f.read(clut_len - 12)
+        count = w16 * h16
+        clut = []
+        for i in range(count):
+            val = struct.unpack_from('<H', clut_bytes, i*2)[0]
+            r = (val & 0x1F); g = (val >> 5) & 0x1F; b = (val >> 10) & 0x1F
+            # Expand 5-bit to 8-bit
+            r = (r << 3) | (r >> 2)
+            g = (g << 3) | (g >> 2)
+            b = (b << 3) | (b >> 2)
+            clut.append((r, g, b))
+    img_len = struct.unpack('<I', f.read(4))[0]
+    ox, oy, w16, h16 = struct.unpack('<HHHH', f.read(8))
+    img_bytes = f.read(img_len - 12)
+    data = []
+    if bpp == 4:
+        px_width = w16 * 4
+        offset = 0
+        for y in range(h16):
+            row = []
+            for x in range(w16):
+                word = struct.unpack_from('<H', img_bytes, offset)[0]
+                offset += 2
+                for i in range(4):
+                    idx = (word >> (4*i)) & 0xF
+                    row.append(idx)
+            data.append(row[:px_width])
+    elif bpp == 8:
+        px_width = w16 * 2
+        offset = 0
+        for y in range(h16):
+            row = []
+            for x in range(w16):
+                word = struct.unpack_from('<H', img_bytes, offset)[0]
+                offset += 2
+                lo = word & 0xFF
+                hi = (word >> 8) & 0xFF
+                row.append(lo); row.append(hi)
+            data.append(row[:px_width])
+    elif bpp == 16:
+        offset = 0
+        for y in range(h16):
+            row = []
+            for x in range(w16):
+                val = struct.unpack_from('<H', img_bytes, offset)[0]
+                offset += 2
+                r = val & 0x1F; g = (val >> 5) & 0x1F; b = (val >> 10) & 0x1F
                 r = (r << 3) | (r >> 2)
                 g = (g << 3) | (g >> 2)
                 b = (b << 3) | (b >> 2)
-                clut.append((r, g, b))
-        img_len = struct.unpack('<I', f.read(4))[0]
-        ox, oy, w16, h16 = struct.unpack('<HHHH', f.read(8))
-        img_bytes = f.read(img_len - 12)
-        data = []
-        if bpp == 4:
-            px_width = w16 * 4
-            offset = 0
-            for y in range(h16):
-                row = []
-                for x in range(w16):
-                    word = struct.unpack_from('<H', img_bytes, offset)[0]
-                    offset += 2
-                    for i in range(4):
-                        idx = (word >> (4*i)) & 0xF
-                        row.append(idx)
-                data.append(row[:px_width])
-        elif bpp == 8:
-            px_width = w16 * 2
-            offset = 0
-            for y in range(h16):
-                row = []
-                for x in range(w16):
-                    word = struct.unpack_from('<H', img_bytes, offset)[0]
-                    offset += 2
-                    lo = word & 0xFF
-                    hi = (word >> 8) & 0xFF
-                    row.append(lo); row.append(hi)
-                data.append(row[:px_width])
-        elif bpp == 16:
-            offset = 0
-            for y in range(h16):
-                row = []
-                for x in range(w16):
-                    val = struct.unpack_from('<H', img_bytes, offset)[0]
-                    offset += 2
-                    r = val & 0x1F; g = (val >> 5) & 0x1F; b = (val >> 10) & 0x1F
-                    r = (r << 3) | (r >> 2)
-                    g = (g << 3) | (g >> 2)
-                    b = (b << 3) | (b >> 2)
-                    row.append((r, g, b))
-                data.append(row)
-        elif bpp == 24:
-            px_width = (w16 * 2) // 3
-            offset = 0
-            for y in range(h16):
-                row = []
-                for x in range(px_width):
-                    b = img_bytes[offset]; g = img_bytes[offset+1]; r = img_bytes[offset+2]
-                    offset += 3
-                    row.append((r, g, b))
-                # align to 16-bit boundary
-                offset = (y+1) * (w16 * 2)
-                data.append(row)
-        else:
-            raise ValueError("Unsupported bit depth")
-        return {'bpp': bpp, 'clut': clut, 'data': data, 'width': (px_width if bpp in (4,8,24) else w16), 'height': h16}
+                row.append((r, g, b))
+            data.append(row)
+    elif bpp == 24:
+        px_width = (w16 * 2) // 3
+        offset = 0
+        for y in range(h16):
+            row = []
+            for x in range(px_width):
+                b = img_bytes[offset]; g = img_bytes[offset+1]; r = img_bytes[offset+2]
+                offset += 3
+                row.append((r, g, b))
+            # align to 16-bit boundary
+            offset = (y+1) * (w16 * 2)
+            data.append(row)
+    else:
+        raise ValueError("Unsupported bit depth")
+    return {'bpp': bpp, 'clut': clut, 'data': data, 'width': (px_width if bpp in (4,8,24) else w16), 'height': h16}
 
-def save_tim(filepath, info):
+def encode_tim(info):
     """
-    Save a TIM file from the given image info dict.
+    Encode the given image info dict as TIM file bytes.
     """
     bpp = info['bpp']; clut = info.get('clut'); data = info['data']
     width = info['width']; height = info['height']
@@ -199,13 +235,12 @@ def save_tim(filepath, info):
                 val = ((b>>3)<<10)|((g>>3)<<5)|(r>>3)
                 pixels += struct.pack('<H', val)
     elif bpp == 24:
+        row_len = w16*2
         for row in data:
             for (r, g, b) in row:
                 pixels += bytes((b, g, r))
-        row_len = w16*2
-        for y in range(height):
-            used = len(data[y])*3
-            pad = row_len - used
+            # each row is padded to a 16-bit boundary (odd widths)
+            pad = row_len - len(row)*3
             if pad>0:
                 pixels += b'\x00'*pad
     img_len = 12 + len(pixels)
@@ -215,9 +250,860 @@ def save_tim(filepath, info):
     img_block.append(struct.pack('<HH', w16, h16))
     img_block.append(pixels)
     parts.append(b''.join(img_block))
-    with open(filepath, 'wb') as f:
-        for part in parts:
-            f.write(part)
+    return b''.join(parts)
+
+def save_tim(filepath, info):
+    """
+    Save a TIM file from the given image info dict.
+    """
+    atomic_write(filepath, encode_tim(info))
+
+# PSX VRAM is 1024x512 16-bit words; a texture page spans 256x256 texels at any depth.
+VRAM_WIDTH = 1024
+VRAM_HEIGHT = 512
+TPAGE_SIZE = 256
+
+def tim_tile_limits(bpp):
+    """Return the largest (width, height) in pixels a single TIM tile may use at this bit depth."""
+    if bpp == 24:
+        # 24bpp data is never sampled as a texture, so only the VRAM size applies
+        return (VRAM_WIDTH * 2) // 3, VRAM_HEIGHT
+    return TPAGE_SIZE, TPAGE_SIZE
+
+def rows_to_pil(info):
+    """Build an RGB PIL image from a direct-color (16/24 bpp) info dict."""
+    pil_img = Image.new("RGB", (info['width'], info['height']))
+    pil_img.putdata([pix for row in info['data'] for pix in row])
+    return pil_img
+
+def pil_to_tim_info(pil_img, bpp):
+    """
+    Convert a PIL image to a TIM info dict at the given bit depth.
+    4/8 bpp images are quantized to an adaptive 16/256 color CLUT.
+    """
+    width, height = pil_img.size
+    if bpp in (4, 8):
+        colors = 16 if bpp == 4 else 256
+        pil_img = pil_img.convert("RGB").convert("P", palette=Image.Palette.ADAPTIVE, colors=colors)
+        pal = pil_img.getpalette()[:colors*3]
+        pal += [0] * (colors*3 - len(pal))
+        clut = [(pal[i], pal[i+1], pal[i+2]) for i in range(0, colors*3, 3)]
+    else:
+        pil_img = pil_img.convert("RGB")
+        clut = None
+    pixels = list(pil_img.getdata())
+    data = [pixels[y*width:(y+1)*width] for y in range(height)]
+    return {'bpp': bpp, 'clut': clut, 'data': data, 'width': width, 'height': height}
+
+def info_to_pil(info):
+    """Build a PIL image from any info dict ('P' for CLUT images, 'RGB' otherwise)."""
+    if info.get('clut') and info['bpp'] in (4, 8):
+        pil_img = Image.new("P", (info['width'], info['height']))
+        pil_img.putpalette([c for rgb in info['clut'][:256] for c in rgb])
+        pil_img.putdata([idx for row in info['data'] for idx in row])
+        return pil_img
+    return rows_to_pil(info)
+
+# Only adaptive, undithered quantization is implemented; the names are part of
+# the cache key so that adding other modes later cannot return stale entries.
+TIM_CONVERSION_PARAMS = {'palette': 'adaptive', 'dither': 'none'}
+
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+class ConversionCache:
+    """
+    Content-addressed store for encoded conversion outputs (TIM/PNG bytes).
+    Entries are keyed by a hash of the source bytes plus the conversion parameters
+    and live under <config dir>/cache. Once the total size passes max_bytes the
+    least recently used entries are evicted.
+    An instance may be shared between threads. Several instances (or processes) may
+    use the same root: flush() merges with the index on disk instead of overwriting it.
+    """
+    _index_lock = threading.Lock()  # serializes index read-merge-write within the process
+
+    def __init__(self, root=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.root = root or os.path.join(_config_dir(), "cache")
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, "index.json")
+        self.entries = {}  # "<key>.<ext>" -> {'size', 'atime'}
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0}
+        self._lock = threading.RLock()
+        self._stats_delta = dict.fromkeys(self.stats, 0)  # not yet flushed
+        self._removed = set()                             # evicted since the last flush
+        self._dirty = False
+        os.makedirs(self.root, exist_ok=True)
+        self.entries, self.stats = self._read_index()
+
+    def _read_index(self):
+        entries = {}; stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                entries = index.get("entries", {})
+                stats.update(index.get("stats", {}))
+            except Exception:
+                pass
+        return entries, stats
+
+    @staticmethod
+    def make_key(source_bytes, params):
+        h = hashlib.sha256(source_bytes)
+        h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_path(self, name):
+        return os.path.join(self.root, name[:2], name)
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(e['size'] for e in self.entries.values())
+
+    def _count(self, stat, n=1):
+        self.stats[stat] += n
+        self._stats_delta[stat] += n
+
+    def get(self, key, ext):
+        """Return the cached output bytes, or None on a miss."""
+        name = f"{key}.{ext}"
+        with self._lock:
+            entry = self.entries.get(name)
+            data = None
+            if entry is not None:
+                try:
+                    with open(self._entry_path(name), "rb") as f:
+                        data = f.read()
+                except OSError:
+                    del self.entries[name]
+                    self._removed.add(name)
+            self._dirty = True
+            if data is None:
+                self._count('misses')
+                return None
+            entry['atime'] = time.time()
+            self._count('hits')
+            self._count('bytes_saved', len(data))
+            return data
+
+    def put(self, key, ext, data):
+        name = f"{key}.{ext}"
+        path = self._entry_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, data)
+        with self._lock:
+            self.entries[name] = {'size': len(data), 'atime': time.time()}
+            self._removed.discard(name)
+            self._dirty = True
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return
+            for name, entry in sorted(self.entries.items(), key=lambda kv: kv[1]['atime']):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._entry_path(name))
+                except OSError:
+                    pass
+                total -= entry['size']
+                del self.entries[name]
+                self._removed.add(name)
+            self._dirty = True
+
+    def flush(self):
+        """Merge this instance's changes into the index on disk and persist it."""
+        with self._lock, self._index_lock:
+            if not self._dirty:
+                return
+            entries, stats = self._read_index()
+            for name in self._removed:
+                entries.pop(name, None)
+            for name, entry in self.entries.items():
+                on_disk = entries.get(name)
+                if on_disk is None:
+                    # Another instance may have evicted it since we last looked
+                    if os.path.exists(self._entry_path(name)):
+                        entries[name] = entry
+                elif on_disk['atime'] < entry['atime']:
+                    entries[name] = entry
+            for stat, n in self._stats_delta.items():
+                stats[stat] = stats.get(stat, 0) + n
+            self.entries, self.stats = entries, stats
+            self._stats_delta = dict.fromkeys(self._stats_delta, 0)
+            self.evict()  # the merged index may be over the limit
+            self._removed.clear()
+            try:
+                atomic_write(self.index_path, json.dumps({"entries": self.entries, "stats": self.stats}).encode("utf-8"))
+                self._dirty = False
+            except Exception:
+                pass
+
+def encode_pil_as_tim(pil_img, bpp, cache=None):
+    """Quantize/encode a PIL image as TIM bytes, reusing a cached result for identical pixels."""
+    rgb = pil_img.convert("RGB")
+    key = None
+    if cache is not None:
+        params = dict(TIM_CONVERSION_PARAMS, to='tim', bpp=bpp, size=list(rgb.size))
+        key = cache.make_key(rgb.tobytes(), params)
+        data = cache.get(key, "tim")
+        if data is not None:
+            return data
+    data = encode_tim(pil_to_tim_info(rgb, bpp))
+    if cache is not None:
+        cache.put(key, "tim", data)
+    return data
+
+def convert_image_file(src_path, dst_path, bpp=8, cache=None):
+    """
+    Convert an image file to TIM (dst *.tim) or a TIM to PNG (dst *.png).
+    The cache key is the source file's bytes plus the conversion parameters, so an
+    unchanged source is never decoded again. If dst already holds the same bytes it
+    is left untouched (no mtime change for watchers or rebuild hashing).
+    Returns True on a cache hit.
+    """
+    with open(src_path, "rb") as f:
+        src_bytes = f.read()
+    ext = "tim" if dst_path.lower().endswith(".tim") else "png"
+    params = dict(TIM_CONVERSION_PARAMS, to=ext, bpp=bpp if ext == "tim" else None)
+    key = data = None
+    if cache is not None:
+        key = cache.make_key(src_bytes, params)
+        data = cache.get(key, ext)
+    hit = data is not None
+    if not hit:
+        if ext == "tim":
+            with Image.open(io.BytesIO(src_bytes)) as pil_img:
+                data = encode_tim(pil_to_tim_info(pil_img, bpp))
+        else:
+            buf = io.BytesIO()
+            info_to_pil(load_tim(src_path)).save(buf, "PNG")
+            data = buf.getvalue()
+        if cache is not None:
+            cache.put(key, ext, data)
+    if not _file_holds(dst_path, data):
+        atomic_write(dst_path, data)
+    return hit
+
+def _file_holds(path, data):
+    """True if the file at path already contains exactly data."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+def convert_folder_to_tim(folder, bpp, cache=None):
+    """
+    Convert every PNG/JPG/BMP in the folder tree to a sibling .tim.
+    Returns (converted, cache_hits).
+    """
+    converted = hits = 0
+    for root, dirs, names in os.walk(folder):
+        dirs.sort()
+        for name in sorted(names):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in (".png", ".jpg", ".bmp"):
+                continue
+            src = os.path.join(root, name)
+            if convert_image_file(src, os.path.join(root, stem + ".tim"), bpp, cache):
+                hits += 1
+            converted += 1
+    return converted, hits
+
+def import_image_as_tim_tiles(src_path, out_dir, bpp, cache=None):
+    """
+    Split a large image into TIM tiles that fit the PSX texture page / VRAM limits.
+    Pillow decodes the whole source into its native buffer (about width*height*4 bytes),
+    and its decompression-bomb limit (Image.MAX_IMAGE_PIXELS) still applies. Tiles are
+    then cut one strip at a time and each is quantized and written before the next, so
+    only a single tile is ever expanded into Python pixel lists.
+    Tiles are named <stem>_<row>_<col>.tim. Returns the list of written TIM paths.
+    """
+    tile_w, tile_h = tim_tile_limits(bpp)
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    written = []
+    with Image.open(src_path) as src:
+        width, height = src.size
+        for ty, y0 in enumerate(range(0, height, tile_h)):
+            y1 = min(y0 + tile_h, height)
+            strip = src.crop((0, y0, width, y1)).convert("RGB")
+            for tx, x0 in enumerate(range(0, width, tile_w)):
+                x1 = min(x0 + tile_w, width)
+                data = encode_pil_as_tim(strip.crop((x0, 0, x1, y1 - y0)), bpp, cache)
+                out_path = os.path.join(out_dir, f"{stem}_{ty:02d}_{tx:02d}.tim")
+                atomic_write(out_path, data)
+                written.append(out_path)
+            strip.close()
+    return written
+
+IMAGE_EXTS = (".tim", ".png", ".jpg", ".bmp")
+
+# TIM magic followed by a flags word with a known bpp and optional CLUT bit
+_TIM_SIGNATURE = re.compile(rb'\x10\x00\x00\x00[\x00-\x03\x08\x09]\x00\x00\x00')
+
+def _vram_block_ok(block_len, x, y, w16, h16):
+    return (0 < w16 and 0 < h16 and x + w16 <= VRAM_WIDTH and y + h16 <= VRAM_HEIGHT
+            and block_len == 12 + w16 * h16 * 2)
+
+def probe_tim(buf, offset):
+    """
+    Validate the TIM header at offset and return (length, bpp, width, height),
+    or None if the flags or CLUT/image block lengths do not describe a real TIM.
+    """
+    size = len(buf)
+    flags = struct.unpack_from('<I', buf, offset + 4)[0]
+    bpp = (4, 8, 16, 24)[flags & 3]
+    pos = offset + 8
+    if flags & 8:
+        if pos + 12 > size:
+            return None
+        if not _vram_block_ok(*struct.unpack_from('<IHHHH', buf, pos)):
+            return None
+        pos += struct.unpack_from('<I', buf, pos)[0]
+    if pos + 12 > size:
+        return None
+    img_len, x, y, w16, h16 = struct.unpack_from('<IHHHH', buf, pos)
+    if not _vram_block_ok(img_len, x, y, w16, h16) or pos + img_len > size:
+        return None
+    width = {4: w16 * 4, 8: w16 * 2, 16: w16, 24: (w16 * 2) // 3}[bpp]
+    return pos + img_len - offset, bpp, width, h16
+
+def scan_embedded_tims(path):
+    """
+    Memory-map an arbitrary binary file (archive, disc dump) and index the TIMs in it.
+    Candidates come from a regex signature search over the map, which runs at C speed,
+    and are kept only if probe_tim() accepts them. Hits never overlap, so signatures
+    inside a found TIM's pixel data are skipped.
+    Returns a list of dicts: {'offset', 'length', 'bpp', 'width', 'height'}.
+    """
+    hits = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 20:
+            return hits
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = 0
+            for m in _TIM_SIGNATURE.finditer(mm):
+                offset = m.start()
+                if offset < end:
+                    continue
+                found = probe_tim(mm, offset)
+                if found is None:
+                    continue
+                length, bpp, width, height = found
+                hits.append({'offset': offset, 'length': length, 'bpp': bpp, 'width': width, 'height': height})
+                end = offset + length
+    return hits
+
+def load_embedded_tim(path, offset, length):
+    """Decode one indexed TIM straight from a memoryview slice of the mapped container."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            chunk = view[offset:offset + length]
+            try:
+                return parse_tim(chunk)
+            except Exception as e:
+                # The traceback's frames still hold sub-slices of the map; drop them so
+                # the view and map can be released and the real error propagates
+                traceback.clear_frames(e.__traceback__)
+                raise
+            finally:
+                chunk.release()
+                view.release()
+
+class _ScanSignals(QObject):
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+class ScanTask(QRunnable):
+    """Run scan_embedded_tims() on the global thread pool."""
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = _ScanSignals()
+
+    def run(self):
+        try:
+            hits = scan_embedded_tims(self.path)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.finished.emit(self.path, hits)
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _build_state_path(folder):
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()
+    path = os.path.join(_config_dir(), "builds")
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, key + ".json")
+
+def expand_rebuild_command(command, folder, changed_file):
+    """
+    Fill placeholders in a rebuild command (a list of args): {folder}, {python},
+    {app_dir} (the directory holding ppainter, e.g. for rebuild_stub.py) and
+    {changed_file} (a text file listing the changed TIMs relative to folder, one per
+    line) are substituted inside any arg. The list goes through a file because a
+    first build changes every TIM, which would overflow the Windows command line.
+    A hand-edited command given as one string is split like the prompt does.
+    """
+    if isinstance(command, str):
+        command = shlex.split(command, posix=(os.name != "nt"))
+    values = {"{folder}": folder, "{python}": sys.executable, "{changed_file}": changed_file,
+              "{app_dir}": os.path.dirname(os.path.abspath(__file__))}
+    args = []
+    for arg in command:
+        for name, value in values.items():
+            arg = arg.replace(name, value)
+        args.append(arg)
+    return args
+
+def read_tim_bpp(path):
+    """Return a TIM's bit depth from its header flags, or None if it is not a TIM."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(8)
+    except OSError:
+        return None
+    if len(header) < 8 or header[:4] != b'\x10\x00\x00\x00':
+        return None
+    return (4, 8, 16, 24)[header[4] & 3]
+
+def run_texture_rebuild(folder, command, cache=None, default_bpp=8, timeout=None):
+    """
+    Incrementally rebuild a texture tree:
+    1. hash the tree (stat-unchanged files reuse their stored hash),
+    2. re-convert PNG/JPG/BMP sources that changed and are newer than their sibling
+       .tim (keeping that TIM's bpp, else default_bpp),
+    3. run the external rebuild command if any TIM changed since the last successful build.
+    The build manifest lives under <config dir>/builds and is only committed when the
+    command exits with 0, so a failed build is retried next time.
+    Returns a result dict with the changed TIMs, command output and per-stage timings.
+    """
+    # The command runs with cwd=folder, so a relative {folder} would resolve inside itself
+    folder = os.path.abspath(folder)
+    state_path = _build_state_path(folder)
+    state = {"files": {}, "built": {}}
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state.update(json.load(f))
+        except Exception:
+            pass
+    known = state["files"]; built = state["built"]
+    timings = {}
+
+    def hash_tree():
+        hashes = {}
+        for root, _, names in os.walk(folder):
+            for name in names:
+                if not name.lower().endswith(IMAGE_EXTS):
+                    continue
+                full = os.path.join(root, name)
+                rel = os.path.relpath(full, folder).replace(os.sep, "/")
+                stat = _file_stat(full)
+                if stat is None:
+                    continue  # removed while walking
+                entry = known.get(rel)
+                if entry and tuple(entry[:2]) == stat:
+                    digest = entry[2]
+                else:
+                    try:
+                        digest = file_sha256(full)
+                    except OSError:
+                        continue
+                    known[rel] = [stat[0], stat[1], digest]
+                hashes[rel] = digest
+        return hashes
+
+    t0 = time.perf_counter()
+    hashes = hash_tree()
+    timings['hash'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    converted = []
+    for rel, digest in sorted(hashes.items()):
+        stem, ext = os.path.splitext(rel)
+        if ext.lower() == ".tim" or built.get(rel) == digest:
+            continue
+        src = os.path.join(folder, rel)
+        dst = os.path.join(folder, stem + ".tim")
+        src_stat = _file_stat(src)
+        dst_stat = _file_stat(dst)
+        if src_stat is None:
+            continue
+        if dst_stat and dst_stat[0] >= src_stat[0]:
+            continue  # the TIM was edited after this source
+        bpp = (read_tim_bpp(dst) if dst_stat else None) or default_bpp
+        convert_image_file(src, dst, bpp, cache)
+        converted.append(rel)
+    if cache is not None:
+        cache.flush()
+    if converted:
+        hashes = hash_tree()
+    timings['convert'] = time.perf_counter() - t0
+
+    changed = sorted(rel for rel, digest in hashes.items()
+                     if rel.lower().endswith(".tim") and built.get(rel) != digest)
+    removed = sorted(rel for rel in built if rel not in hashes)
+    result = {'folder': folder, 'changed': changed, 'converted': converted, 'removed': removed,
+              'command': None, 'returncode': None, 'stdout': "", 'stderr': "", 'timings': timings}
+    if changed or removed or converted:
+        changed_file = os.path.splitext(state_path)[0] + ".changed.txt"
+        atomic_write(changed_file, "".join(rel + "\n" for rel in changed).encode("utf-8"))
+        args = expand_rebuild_command(command, folder, changed_file)
+        result['command'] = args
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.run(args, cwd=folder, capture_output=True, text=True,
+                                  errors="replace", timeout=timeout)
+            result.update(returncode=proc.returncode, stdout=proc.stdout, stderr=proc.stderr)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            result.update(returncode=-1, stderr=str(e))
+        timings['command'] = time.perf_counter() - t0
+    if result['returncode'] in (None, 0):
+        state["built"] = {rel: digest for rel, digest in hashes.items()}
+    state["files"] = {rel: entry for rel, entry in known.items() if rel in hashes}
+    atomic_write(state_path, json.dumps(state).encode("utf-8"))
+    return result
+
+def append_build_log(result):
+    """Append a rebuild result (command, timings, captured output) to <config dir>/builds/rebuild.log."""
+    path = os.path.join(os.path.dirname(_build_state_path(result['folder'])), "rebuild.log")
+    timings = ", ".join(f"{k} {v:.2f}s" for k, v in result['timings'].items())
+    lines = [f"=== {time.strftime('%Y-%m-%d %H:%M:%S')} {result['folder']}",
+             f"changed: {len(result['changed'])}, converted: {len(result['converted'])}, "
+             f"removed: {len(result['removed'])} | {timings}"]
+    if result['command']:
+        lines.append(f"$ {subprocess.list2cmdline(result['command'])} -> exit {result['returncode']}")
+        lines += [result['stdout'].rstrip(), result['stderr'].rstrip()]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(line for line in lines if line) + "\n")
+    return path
+
+class _RebuildSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str, str)
+
+class RebuildTask(QRunnable):
+    """Run run_texture_rebuild() on the rebuild job queue."""
+    def __init__(self, folder, command, cache, default_bpp, timeout):
+        super().__init__()
+        self.folder = folder
+        self.command = command
+        self.cache = cache
+        self.default_bpp = default_bpp
+        self.timeout = timeout
+        self.signals = _RebuildSignals()
+
+    def run(self):
+        try:
+            result = run_texture_rebuild(self.folder, self.command, self.cache, self.default_bpp, self.timeout)
+            append_build_log(result)
+        except Exception as e:
+            self.signals.failed.emit(self.folder, str(e))
+            return
+        self.signals.finished.emit(result)
+
+# Item data role holding (offset, length) for TIMs embedded in a container file
+EMBEDDED_TIM_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Read once at import (os.umask can only be queried by setting it, which is not thread-safe)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def atomic_write(path, data):
+    """
+    Write bytes to path via a temp file in the same directory, fsync it and rename
+    it over the target, so a crash leaves either the old or the new file intact.
+    The target keeps its permissions; a new file gets the usual umask-based mode.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix="." + os.path.basename(path), suffix=".tmp")
+    try:
+        try:
+            mode = S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)  # mkstemp creates 0600
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself (POSIX only)
+        try:
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+def snapshot_info(info):
+    """Copy an info dict deep enough that later edits cannot race a background encode."""
+    snap = dict(info)
+    snap['clut'] = list(info['clut']) if info.get('clut') is not None else None
+    snap['data'] = [list(row) for row in info['data']]
+    return snap
+
+def encode_image(info, path):
+    """Encode an info dict for the format implied by path's extension."""
+    if path.lower().endswith(".tim"):
+        return encode_tim(info)
+    fmt = path.split('.')[-1].upper()
+    fmt = {"JPG": "JPEG"}.get(fmt, fmt)
+    buf = io.BytesIO()
+    info_to_pil(info).convert("RGB").save(buf, fmt)
+    return buf.getvalue()
+
+class _SaveSignals(QObject):
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+class SaveTask(QRunnable):
+    """
+    Encode a snapshot and atomically write it; run on the single-threaded save pool.
+    With bpp set, a direct-color snapshot is first quantized to a TIM of that depth.
+    """
+    def __init__(self, path, info, bpp=None, cache=None):
+        super().__init__()
+        self.path = path
+        self.info = info
+        self.bpp = bpp
+        self.cache = cache
+        self.signals = _SaveSignals()
+
+    def run(self):
+        try:
+            if self.bpp is not None:
+                data = encode_pil_as_tim(rows_to_pil(self.info), self.bpp, self.cache)
+                if self.cache is not None:
+                    self.cache.flush()
+            else:
+                data = encode_image(self.info, self.path)
+            atomic_write(self.path, data)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.saved.emit(self.path)
+
+class _TileImportSignals(QObject):
+    finished = pyqtSignal(str, list)
+    failed = pyqtSignal(str, str)
+
+class TileImportTask(QRunnable):
+    """Run import_image_as_tim_tiles() on the save pool, after any queued saves."""
+    def __init__(self, src_path, out_dir, bpp, cache=None):
+        super().__init__()
+        self.src_path = src_path
+        self.out_dir = out_dir
+        self.bpp = bpp
+        self.cache = cache
+        self.signals = _TileImportSignals()
+
+    def run(self):
+        try:
+            written = import_image_as_tim_tiles(self.src_path, self.out_dir, self.bpp, self.cache)
+        except Exception as e:
+            self.signals.failed.emit(self.src_path, str(e))
+            return
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+        self.signals.finished.emit(self.out_dir, written)
+
+def _recovery_dir():
+    path = os.path.join(_config_dir(), "recovery")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def journal_path_for(path):
+    """Recovery journal location for a document path."""
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(_recovery_dir(), key + ".journal")
+
+def read_journal(journal_path):
+    """
+    Parse a recovery journal: a JSON header line followed by one JSON record per
+    autosave holding the dirty rectangle's rows and, if edited, the CLUT.
+    Returns (header, records). A torn last line from a crash is ignored.
+    """
+    header = None; records = []
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                header = rec
+            else:
+                records.append(rec)
+    return header, records
+
+def apply_journal(info, records):
+    """Replay journal records onto a freshly loaded info dict."""
+    direct = info['bpp'] in (16, 24) or not info.get('clut')
+    for rec in records:
+        if rec.get('clut') is not None:
+            info['clut'] = [tuple(c) for c in rec['clut']]
+        if rec.get('rect'):
+            x0, y0, x1, y1 = rec['rect']
+            for dy, row in enumerate(rec['rows']):
+                info['data'][y0 + dy][x0:x1] = [tuple(p) for p in row] if direct else row
+    return info
+
+def read_image_file(path):
+    """Load a TIM or a standard image file into an info dict."""
+    if path.lower().endswith(".tim"):
+        return load_tim(path)
+    with Image.open(path) as pil_img:
+        return pil_to_tim_info(pil_img, 24)
+
+def _file_stat(path):
+    """Return (mtime_ns, size) for path, or None if it is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class _ImageLoadSignals(QObject):
+    loaded = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+class ImageLoadTask(QRunnable):
+    """Read an image file on the global thread pool and report back through signals."""
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = _ImageLoadSignals()
+
+    def run(self):
+        try:
+            info = read_image_file(self.path)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.loaded.emit(self.path, info)
+
+def union_rect(rect, x0, y0, x1, y1):
+    """Grow an (x0, y0, x1, y1) rectangle, or None, to also cover another one."""
+    if rect is None:
+        return (x0, y0, x1, y1)
+    return (min(rect[0], x0), min(rect[1], y0), max(rect[2], x1), max(rect[3], y1))
+
+def new_layer(name, width, height, fill=None, transparent=None):
+    """
+    Create a layer dict. Direct-color layers use None for empty pixels; indexed layers
+    are filled with their 'transparent' CLUT index, which lets lower layers show through.
+    """
+    return {'name': name, 'data': [[fill] * width for _ in range(height)],
+            'visible': True, 'opacity': 100, 'transparent': transparent}
+
+def composite_layers(layers, out_rows, rect, indexed):
+    """Flatten the visible layers (bottom first) into out_rows, only inside rect."""
+    x0, y0, x1, y1 = rect
+    visible = [layer for layer in layers if layer['visible']]
+    for y in range(y0, y1):
+        srcs = [(layer['data'][y], layer['transparent'], layer['opacity']) for layer in visible]
+        out = out_rows[y]
+        for x in range(x0, x1):
+            if indexed:
+                px = 0
+                for row, key, _ in srcs:
+                    if row[x] != key:
+                        px = row[x]
+            else:
+                px = (0, 0, 0)
+                for row, _, opacity in srcs:
+                    v = row[x]
+                    if v is None or opacity <= 0:
+                        continue
+                    if opacity >= 100:
+                        px = v
+                    else:
+                        px = tuple((c * opacity + p * (100 - opacity)) // 100 for c, p in zip(v, px))
+            out[x] = px
+
+PALETTE_COLUMNS = 16
+SWATCH_SIZE = 18
+
+class PaletteModel(QAbstractTableModel):
+    """
+    16-column swatch grid over a CLUT list (one row per 16 entries, so each 4bpp
+    palette is one row). Swatches are produced from the CLUT on demand: loading a
+    file only resets the model and editing an entry emits dataChanged for one cell.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.clut = []
+
+    def set_clut(self, clut):
+        self.beginResetModel()
+        self.clut = clut if clut is not None else []
+        self.endResetModel()
+
+    def entry_index(self, index):
+        return index.row() * PALETTE_COLUMNS + index.column()
+
+    def set_color(self, entry, rgb):
+        self.clut[entry] = rgb
+        cell = self.index(entry // PALETTE_COLUMNS, entry % PALETTE_COLUMNS)
+        self.dataChanged.emit(cell, cell, [Qt.ItemDataRole.BackgroundRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return (len(self.clut) + PALETTE_COLUMNS - 1) // PALETTE_COLUMNS
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else PALETTE_COLUMNS
+
+    def flags(self, index):
+        if not index.isValid() or self.entry_index(index) >= len(self.clut):
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entry_index(index)
+        if entry >= len(self.clut):
+            return None
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return QColor(*self.clut[entry])
+        if role == Qt.ItemDataRole.ToolTipRole:
+            r, g, b = self.clut[entry]
+            return f"Index {entry}: ({r}, {g}, {b})"
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return f"{section:X}"
+        return str(section * PALETTE_COLUMNS)
 
 class Canvas(QLabel):
     def __init__(self, parent=None):
@@ -260,6 +1146,9 @@ class MainWindow(QMainWindow):
 
         # NEW: config
         self.config = load_config()
+        self.conversion_cache = ConversionCache(
+            max_bytes=self.config.get("cache_max_mb", DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)) * 1024 * 1024
+        )
 
         self.canvas = Canvas(self)
         app_dir = os.path.dirname(os.path.abspath(__file__))
@@ -282,6 +1171,10 @@ class MainWindow(QMainWindow):
         self.create_toolbar()
         self.create_palette_editor()
         self.create_file_browser()
+        self.create_folder_watcher()
+        self.create_save_queue()
+        self.create_layer_panel()
+        self.create_rebuild_queue()
 
         # NEW: Ask once on first run to link GTVolTools
         if "voltools_path" not in self.config:
@@ -293,6 +1186,15 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.StandardButton.Yes:
                 self._prompt_and_save_voltools_path()
 
+        QTimer.singleShot(0, self.offer_recovery)
+
+    def closeEvent(self, event):
+        self.save_pool.waitForDone()
+        QCoreApplication.processEvents()  # deliver save results so a failed save is journaled
+        self.autosave()
+        self.rebuild_pool.waitForDone()
+        super().closeEvent(event)
+
     def create_actions(self):
         app_dir = os.path.dirname(os.path.abspath(__file__))
         icon_dir = os.path.join(app_dir, "icons")
@@ -343,6 +1245,26 @@ class MainWindow(QMainWindow):
         convert_act.triggered.connect(self.convert_png_to_tim)
         toolbar.addAction(convert_act)
 
+        import_tiles_act = QAction(QIcon(os.path.join(icon_dir, "open.png")), "Import Large Image as TIM Tiles", self)
+        import_tiles_act.setToolTip("Split a large image into VRAM-sized TIM tiles")
+        import_tiles_act.triggered.connect(self.import_large_image)
+        toolbar.addAction(import_tiles_act)
+
+        convert_folder_act = QAction(QIcon(os.path.join(icon_dir, "folder.png")), "Convert Folder to TIM", self)
+        convert_folder_act.setToolTip("Convert every image in a folder to TIM (unchanged files come from the cache)")
+        convert_folder_act.triggered.connect(self.convert_folder)
+        toolbar.addAction(convert_folder_act)
+
+        scan_act = QAction(QIcon(os.path.join(icon_dir, "open.png")), "Scan Archive for TIMs", self)
+        scan_act.setToolTip("Find TIMs embedded in an archive or disc dump and list them in the file dock")
+        scan_act.triggered.connect(self.scan_archive)
+        toolbar.addAction(scan_act)
+
+        rebuild_act = QAction(QIcon(os.path.join(icon_dir, "voltools_linked.png")), "Rebuild Changed Textures", self)
+        rebuild_act.setToolTip("Re-convert changed textures and run the configured rebuild command")
+        rebuild_act.triggered.connect(self.rebuild_changed_textures)
+        toolbar.addAction(rebuild_act)
+
         # NEW
     def _voltools_path(self) -> str | None:
         path = self.config.get("voltools_path")
@@ -390,6 +1312,72 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Failed to launch GTVolTools", f"{e}")
 
     
+    def create_rebuild_queue(self):
+        self.rebuild_pool = QThreadPool(self)
+        self.rebuild_pool.setMaxThreadCount(1)  # builds of a tree share its manifest
+        self._rebuild_pending = 0
+        self._rebuild_max_pending = int(self.config.get("rebuild_queue_size", 4))
+
+    def _default_rebuild_command(self):
+        if getattr(sys, "frozen", False):
+            # In a PyInstaller build {python} is ppainter itself and the stub isn't shipped
+            return ""
+        return "{python} {app_dir}/rebuild_stub.py {folder} {changed_file}"
+
+    def _prompt_rebuild_command(self):
+        current = self.config.get("rebuild_command", [])
+        if not isinstance(current, str):
+            current = subprocess.list2cmdline(current)
+        text, ok = QInputDialog.getText(
+            self, "Rebuild Command",
+            "Command run after textures change ({folder}, {changed_file}, {python} and {app_dir} are filled in):",
+            text=current or self._default_rebuild_command()
+        )
+        if not ok or not text.strip():
+            return None
+        self.config["rebuild_command"] = shlex.split(text, posix=(os.name != "nt"))
+        save_config(self.config)
+        return self.config["rebuild_command"]
+
+    def rebuild_changed_textures(self):
+        folder = self.watched_folder or QFileDialog.getExistingDirectory(self, "Select Texture Folder to Rebuild")
+        if not folder:
+            return
+        command = self.config.get("rebuild_command") or self._prompt_rebuild_command()
+        if not command:
+            return
+        if self._rebuild_pending >= self._rebuild_max_pending:
+            self.statusBar().showMessage("Rebuild queue is full; wait for the running builds to finish")
+            return
+        task = RebuildTask(
+            folder, command, self.conversion_cache,
+            int(self.config.get("rebuild_default_bpp", 8)),
+            self.config.get("rebuild_timeout_seconds", 600)
+        )
+        task.signals.finished.connect(self._on_rebuild_finished)
+        task.signals.failed.connect(self._on_rebuild_failed)
+        self._rebuild_pending += 1
+        self.rebuild_pool.start(task)
+        self.statusBar().showMessage(f"Rebuild queued for {folder} ({self._rebuild_pending} pending)")
+
+    def _on_rebuild_finished(self, result):
+        self._rebuild_pending -= 1
+        total = sum(result['timings'].values())
+        if result['command'] is None:
+            self.statusBar().showMessage("Rebuild skipped: no textures changed since the last build")
+        elif result['returncode'] == 0:
+            self.statusBar().showMessage(
+                f"Rebuilt {len(result['changed'])} changed TIM(s), "
+                f"re-converted {len(result['converted'])} in {total:.1f}s"
+            )
+        else:
+            QMessageBox.warning(self, "Rebuild failed",
+                                f"Exit code {result['returncode']}\n\n{result['stderr'][-2000:]}")
+
+    def _on_rebuild_failed(self, folder, err):
+        self._rebuild_pending -= 1
+        QMessageBox.warning(self, "Rebuild failed", f"{folder}:\n{err}")
+
     def create_file_browser(self):
         self.file_dock = QDockWidget("Files", self)
         self.file_list = QListWidget()
@@ -397,6 +1385,274 @@ class MainWindow(QMainWindow):
         self.file_dock.setWidget(self.file_list)
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.file_dock)
         
+    def create_folder_watcher(self):
+        self.watched_folder = None
+        self._folder_entries = {}       # name -> (mtime_ns, size)
+        self._file_rows = []            # sorted names, one per file_list row
+        self._current_file_stat = None  # stat of current_file when last loaded/saved
+        self._pending_file_changes = set()
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self._on_watched_path_changed)
+        self.fs_watcher.fileChanged.connect(self._on_watched_path_changed)
+        # Extractors touch many files at once; coalesce bursts into one refresh
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(300)
+        self._refresh_timer.timeout.connect(self._apply_folder_changes)
+        # A deleted folder drops out of the watcher; poll until it is re-created
+        self._folder_retry_timer = QTimer(self)
+        self._folder_retry_timer.setSingleShot(True)
+        self._folder_retry_timer.setInterval(1000)
+        self._folder_retry_timer.timeout.connect(self._retry_watched_folder)
+
+    def _watch_folder(self, folder):
+        if self.watched_folder and self.watched_folder in self.fs_watcher.directories():
+            self.fs_watcher.removePath(self.watched_folder)
+        self._folder_retry_timer.stop()
+        self.watched_folder = folder
+        if folder:
+            self.fs_watcher.addPath(folder)
+
+    def _watch_current_file(self, path):
+        files = self.fs_watcher.files()
+        if files:
+            self.fs_watcher.removePaths(files)
+        self._current_file_stat = _file_stat(path) if path else None
+        if path and os.path.exists(path):
+            self.fs_watcher.addPath(path)
+
+    def _on_watched_path_changed(self, path):
+        self._pending_file_changes.add(path)
+        self._refresh_timer.start()
+
+    def _scan_folder(self, folder):
+        entries = {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(IMAGE_EXTS) and entry.is_file():
+                        st = entry.stat()
+                        entries[entry.name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return entries
+
+    def _retry_watched_folder(self):
+        if self.watched_folder:
+            self._pending_file_changes.add(self.watched_folder)
+            self._apply_folder_changes()
+
+    def _apply_folder_changes(self):
+        pending = self._pending_file_changes
+        self._pending_file_changes = set()
+        current_changed = False
+        # A change to the open file alone doesn't alter the listing; skip the rescan
+        if self.watched_folder and pending - {self.current_file}:
+            entries = self._scan_folder(self.watched_folder)
+            old = self._folder_entries
+            removed = old.keys() - entries.keys()
+            added = entries.keys() - old.keys()
+            if len(removed) + len(added) > max(64, len(self._file_rows) // 4):
+                self._fill_file_list(sorted(entries))  # cheaper than many row edits
+            else:
+                for name in removed:
+                    self._remove_file_item(name)
+                for name in sorted(added):
+                    self._insert_file_item(name)
+            self._folder_entries = entries
+            # Watched dir may have been recreated by a re-extract
+            if os.path.isdir(self.watched_folder):
+                if self.watched_folder not in self.fs_watcher.directories():
+                    self.fs_watcher.addPath(self.watched_folder)
+            else:
+                self._folder_retry_timer.start()
+        if self.current_file:
+            stat = _file_stat(self.current_file)
+            current_changed = stat is not None and stat != self._current_file_stat
+            # Atomic replaces drop the file from the watcher; re-arm it
+            if stat is not None and self.current_file not in self.fs_watcher.files():
+                self.fs_watcher.addPath(self.current_file)
+        if current_changed and not self._pending_saves.get(self.current_file):
+            self._current_file_stat = _file_stat(self.current_file)
+            task = ImageLoadTask(self.current_file)
+            task.signals.loaded.connect(self._on_background_load)
+            task.signals.failed.connect(lambda path, err: print("Error:", err))
+            QThreadPool.globalInstance().start(task)
+
+    def _has_unsaved_changes(self):
+        return (self._dirty_rect is not None or self._clut_dirty or bool(self.layers)
+                or self._journal_path is not None)
+
+    def _on_background_load(self, path, info):
+        if path != self.current_file:
+            return  # user moved on while the reload was running
+        if self._has_unsaved_changes():
+            reply = QMessageBox.question(
+                self, "File changed on disk",
+                f"{os.path.basename(path)} was changed by another program.\n"
+                "Reload it and discard your unsaved changes (including layers)?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                self.statusBar().showMessage(f"{os.path.basename(path)} changed on disk; keeping your edits")
+                return
+        self._show_image(path, info)
+        self.statusBar().showMessage(f"Reloaded {os.path.basename(path)} (changed on disk)")
+
+    def _file_item(self, name):
+        item = QListWidgetItem(name)  # show only filename
+        item.setData(Qt.ItemDataRole.UserRole, os.path.join(self.watched_folder, name))  # keep full path hidden
+        return item
+
+    def _fill_file_list(self, names):
+        self.file_list.clear()
+        self._file_rows = list(names)
+        for name in self._file_rows:
+            self.file_list.addItem(self._file_item(name))
+
+    def _remove_file_item(self, name):
+        row = bisect.bisect_left(self._file_rows, name)
+        if row < len(self._file_rows) and self._file_rows[row] == name:
+            del self._file_rows[row]
+            self.file_list.takeItem(row)
+
+    def _insert_file_item(self, name):
+        row = bisect.bisect_left(self._file_rows, name)
+        self._file_rows.insert(row, name)
+        self.file_list.insertItem(row, self._file_item(name))
+
+    def create_save_queue(self):
+        self.save_pool = QThreadPool(self)
+        self.save_pool.setMaxThreadCount(1)  # a single writer keeps saves in submission order
+        self._pending_saves = {}  # path -> number of queued saves
+        self._dirty_rect = None   # (x0, y0, x1, y1) edited since the last journal write
+        self._clut_dirty = False
+        self._journal_path = None
+        self._journal_seq = 0     # journal records written for the current file
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setInterval(int(self.config.get("autosave_seconds", 60)) * 1000)
+        self.autosave_timer.timeout.connect(self.autosave)
+        self.autosave_timer.start()
+
+    def queue_save(self, path, info=None, bpp=None):
+        self._flush_composite()
+        task = SaveTask(path, snapshot_info(info or self.image_info), bpp,
+                        self.conversion_cache if bpp is not None else None)
+        seq = self._journal_seq
+        dirty = None
+        if path == self.current_file:
+            # The snapshot covers all edits so far; only restore them if the save fails
+            dirty = (self._dirty_rect, self._clut_dirty)
+            self._dirty_rect = None; self._clut_dirty = False
+        self._pending_saves[path] = self._pending_saves.get(path, 0) + 1
+        task.signals.saved.connect(lambda saved_path: self._on_save_finished(saved_path, seq))
+        task.signals.failed.connect(lambda failed_path, err: self._on_save_failed(failed_path, err, dirty))
+        self.save_pool.start(task)
+        self.statusBar().showMessage(f"Saving {os.path.basename(path)}...")
+
+    def _save_done(self, path):
+        self._pending_saves[path] -= 1
+        if not self._pending_saves[path]:
+            del self._pending_saves[path]
+
+    def _on_save_finished(self, path, seq):
+        self._save_done(path)
+        if path == self.current_file:
+            self._current_file_stat = _file_stat(path)
+            # Records written after the save was queued may hold newer edits; keep them
+            if self._journal_seq == seq:
+                self._discard_journal()
+        self.statusBar().showMessage(f"Saved {os.path.basename(path)}")
+
+    def _on_save_failed(self, path, err, dirty=None):
+        self._save_done(path)
+        if dirty and path == self.current_file:
+            rect, clut_dirty = dirty
+            if rect is not None:
+                self._dirty_rect = union_rect(self._dirty_rect, *rect)
+            self._clut_dirty = self._clut_dirty or clut_dirty
+        QMessageBox.warning(self, "Save failed", f"Could not save {path}:\n{err}")
+
+    def _mark_dirty(self, x, y):
+        self._dirty_rect = union_rect(self._dirty_rect, x, y, x + 1, y + 1)
+        self._canvas_rect = union_rect(self._canvas_rect, x, y, x + 1, y + 1)
+        if self.layers:
+            self._composite_rect = union_rect(self._composite_rect, x, y, x + 1, y + 1)
+
+    def autosave(self):
+        """Append the dirty region (and CLUT, if edited) to the current file's recovery journal."""
+        if not self.current_file or not self.image_info:
+            return
+        if self._dirty_rect is None and not self._clut_dirty:
+            return
+        self._flush_composite()
+        rec = {}
+        if self._dirty_rect is not None:
+            x0, y0, x1, y1 = self._dirty_rect
+            rec['rect'] = [x0, y0, x1, y1]
+            rec['rows'] = [row[x0:x1] for row in self.image_info['data'][y0:y1]]
+        if self._clut_dirty:
+            rec['clut'] = self.image_info['clut']
+        lines = []
+        mode = "a"
+        if self._journal_path is None:
+            self._journal_path = journal_path_for(self.current_file)
+            mode = "w"
+            lines.append(json.dumps({'path': os.path.abspath(self.current_file), 'bpp': self.image_info['bpp'],
+                                     'width': self.image_info['width'], 'height': self.image_info['height']}))
+        lines.append(json.dumps(rec))
+        try:
+            with open(self._journal_path, mode, encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print("Autosave failed:", e); return
+        self._dirty_rect = None; self._clut_dirty = False
+        self._journal_seq += 1
+
+    def _discard_journal(self):
+        if self._journal_path:
+            try:
+                os.remove(self._journal_path)
+            except OSError:
+                pass
+        self._journal_path = None
+        self._journal_seq = 0
+
+    def offer_recovery(self):
+        journals = [os.path.join(_recovery_dir(), n) for n in os.listdir(_recovery_dir()) if n.endswith(".journal")]
+        journals.sort(key=os.path.getmtime, reverse=True)
+        for journal in journals:
+            try:
+                header, records = read_journal(journal)
+            except OSError:
+                continue
+            path = (header or {}).get('path', '')
+            if not records or not os.path.exists(path):
+                os.remove(journal)  # nothing left that could be restored
+                continue
+            reply = QMessageBox.question(
+                self, "Recover unsaved changes?",
+                f"Unsaved changes to {path} were found from a previous session. Restore them?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                os.remove(journal)
+                continue
+            try:
+                info = read_image_file(path)
+                if (info['bpp'], info['width'], info['height']) != (header['bpp'], header['width'], header['height']):
+                    raise ValueError("file no longer matches the recovery journal")
+                apply_journal(info, records)
+            except Exception as e:
+                QMessageBox.warning(self, "Recovery failed", f"{e}")
+                continue
+            self._show_image(path, info)
+            self._journal_path = journal
+            self.statusBar().showMessage("Recovered unsaved changes - save to keep them")
+            return
+
     def launch_voltools(self):
         voltools_path = r"C:\Path\To\GTVolTools\GTVolToolGui.exe"
         try:
@@ -408,52 +1664,77 @@ class MainWindow(QMainWindow):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder")
         if not folder:
             return
-        self.file_list.clear()
-        exts = (".tim", ".png", ".jpg", ".bmp")
-        for name in sorted(os.listdir(folder)):
-           if name.lower().endswith(exts):
-                full_path = os.path.join(folder, name)
-                item = QListWidgetItem(name)  # show only filename
-                item.setData(Qt.ItemDataRole.UserRole, full_path)  # keep full path hidden
-                self.file_list.addItem(item)
+        self.populate_file_list(folder)
+
+    def populate_file_list(self, folder):
+        self._watch_folder(folder)
+        self._folder_entries = self._scan_folder(folder)
+        self._fill_file_list(sorted(self._folder_entries))
         if self.file_list.count() > 0:
             self.file_dock.show()
 
+    def scan_archive(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Scan Archive for TIMs", "", "All Files (*)")
+        if not path:
+            return
+        task = ScanTask(path)
+        task.signals.finished.connect(self._on_scan_finished)
+        task.signals.failed.connect(lambda p, err: QMessageBox.warning(self, "Scan failed", err))
+        QThreadPool.globalInstance().start(task)
+        self.statusBar().showMessage(f"Scanning {os.path.basename(path)} for TIMs...")
+
+    def _on_scan_finished(self, path, hits):
+        # The dock now shows the archive's contents rather than a folder
+        self._watch_folder(None)
+        self._folder_entries = {}
+        self._fill_file_list([])
+        base = os.path.basename(path)
+        for hit in hits:
+            item = QListWidgetItem(f"{base} @ 0x{hit['offset']:08X}  {hit['width']}x{hit['height']} {hit['bpp']}bpp")
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setData(EMBEDDED_TIM_ROLE, (hit['offset'], hit['length']))
+            self.file_list.addItem(item)
+        if hits:
+            self.file_dock.show()
+        self.statusBar().showMessage(f"Found {len(hits)} TIM(s) in {base}")
+
     def open_file_from_list(self, item):
         path = item.data(Qt.ItemDataRole.UserRole)
-        self.open_file_from_path(path)
-
-    def open_file_from_path(self, path):
-        if path.lower().endswith(".tim"):
+        embedded = item.data(EMBEDDED_TIM_ROLE)
+        if embedded:
+            offset, length = embedded
             try:
-                info = load_tim(path)
+                info = load_embedded_tim(path, offset, length)
             except Exception as e:
                 print("Error:", e); return
-            self.image_info = info; self.current_file = path
-            if info['clut'] is not None and info['bpp'] in (4, 8):
-                self.palette_mode = True; self.brush_index = 0
-                self.populate_palette_table(); self.palette_dock.show()
-            else:
-                self.palette_mode = False; self.palette_dock.hide()
-            self.update_canvas()
+            # No standalone file backs this image, so Save falls through to Save As
+            self._show_image(None, info)
+            self.statusBar().showMessage(f"Embedded TIM at 0x{offset:08X} in {os.path.basename(path)} - use Save As to write it out")
+            return
+        self.open_file_from_path(path)
+
+    def open_file_from_path(self, path):
+        try:
+            info = read_image_file(path)
+        except Exception as e:
+            print("Error:", e); return
+        self._show_image(path, info)
+
+    def _show_image(self, path, info):
+        self._discard_journal()
+        self._dirty_rect = None; self._clut_dirty = False
+        self.image_info = info; self.current_file = path
+        self.layers = None; self.active_layer = 0
+        self._composite_rect = None
+        self._invalidate_canvas()
+        self._refresh_layer_list()
+        if info['clut'] is not None and info['bpp'] in (4, 8):
+            self.palette_mode = True; self.brush_index = 0
+            self.populate_palette_table(); self.palette_dock.show()
         else:
-            try:
-                pil_img = Image.open(path).convert("RGBA")
-            except Exception as e:
-                print("Error:", e); return
-            width, height = pil_img.size
-            pixels = list(pil_img.getdata())
-            rows = []
-            for y in range(height):
-                row = []
-                for x in range(width):
-                    r, g, b, a = pixels[y*width + x]
-                    row.append((r, g, b))
-                rows.append(row)
-            self.image_info = {'bpp':24, 'clut':None, 'data':rows,
-                               'width':width, 'height':height}
-            self.current_file = path; self.palette_mode = False; self.palette_dock.hide()
-            self.update_canvas()
+            self.palette_mode = False; self.palette_dock.hide()
+        self.update_canvas()
+        self._watch_current_file(path)
 
     def convert_png_to_tim(self):
         if not self.image_info or self.image_info['bpp'] != 24 or self.image_info['clut'] is not None:
@@ -464,61 +1745,65 @@ class MainWindow(QMainWindow):
         bpp = prompt_tim_bpp(self)
         if bpp is None:
             return
-        pil_img = Image.new("RGB", (self.image_info['width'], self.image_info['height']))
-        for y, row in enumerate(self.image_info['data']):
-            for x, pix in enumerate(row):
-                pil_img.putpixel((x, y), pix)
-        if bpp == 4:
-            pil_img = pil_img.convert("P", palette=Image.Palette.ADAPTIVE, colors=16)
-            pal = pil_img.getpalette()[:48]
-            clut = [(pal[i], pal[i+1], pal[i+2]) for i in range(0, 48, 3)]
-            data = []
-            for y in range(pil_img.height):
-                row = []
-                for x in range(pil_img.width):
-                    row.append(pil_img.getpixel((x, y)))
-                data.append(row)
-            info = {'bpp': 4, 'clut': clut, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-        elif bpp == 8:
-            pil_img = pil_img.convert("P", palette=Image.Palette.ADAPTIVE, colors=256)
-            pal = pil_img.getpalette()[:768]
-            clut = [(pal[i], pal[i+1], pal[i+2]) for i in range(0, 768, 3)]
-            data = []
-            for y in range(pil_img.height):
-                row = []
-                for x in range(pil_img.width):
-                    row.append(pil_img.getpixel((x, y)))
-                data.append(row)
-            info = {'bpp': 8, 'clut': clut, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-        elif bpp == 16:
-            data = []
-            for y in range(pil_img.height):
-                row = []
-                for x in range(pil_img.width):
-                    r, g, b = pil_img.getpixel((x, y))
-                    row.append((r, g, b))
-                data.append(row)
-            info = {'bpp': 16, 'clut': None, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-        else:  # 24bpp
-            data = []
-            for y in range(pil_img.height):
-                row = []
-                for x in range(pil_img.width):
-                    r, g, b = pil_img.getpixel((x, y))
-                    row.append((r, g, b))
-                data.append(row)
-            info = {'bpp': 24, 'clut': None, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-        save_tim(path, info)    
+        self.queue_save(path, bpp=bpp)
+
+    def import_large_image(self):
+        src, _ = QFileDialog.getOpenFileName(self, "Import Large Image", "",
+                                             "Image Files (*.png *.jpg *.bmp)")
+        if not src:
+            return
+        out_dir = QFileDialog.getExistingDirectory(self, "Select Output Folder for TIM Tiles")
+        if not out_dir:
+            return
+        bpp = prompt_tim_bpp(self)
+        if bpp is None:
+            return
+        task = TileImportTask(src, out_dir, bpp, self.conversion_cache)
+        task.signals.finished.connect(self._on_tile_import_finished)
+        task.signals.failed.connect(lambda path, err: QMessageBox.warning(self, "Import failed", err))
+        self.save_pool.start(task)
+        self.statusBar().showMessage(f"Importing {os.path.basename(src)} as TIM tiles...")
+
+    def _on_tile_import_finished(self, out_dir, written):
+        self.populate_file_list(out_dir)
+        self.statusBar().showMessage(f"Wrote {len(written)} TIM tile(s) to {out_dir}")
+
+    def convert_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder to Convert to TIM")
+        if not folder:
+            return
+        bpp = prompt_tim_bpp(self)
+        if bpp is None:
+            return
+        try:
+            converted, hits = convert_folder_to_tim(folder, bpp, self.conversion_cache)
+        except Exception as e:
+            QMessageBox.warning(self, "Conversion failed", f"{e}")
+            return
+        finally:
+            self.conversion_cache.flush()
+        self.populate_file_list(folder)
+        self.statusBar().showMessage(self._cache_summary(converted, hits))
+
+    def _cache_summary(self, converted, hits):
+        stats = self.conversion_cache.stats
+        return (f"Converted {converted} file(s), {hits} reused from cache | "
+                f"cache: {stats['hits']} hits, {stats['bytes_saved'] // 1024} KB saved, "
+                f"{self.conversion_cache.total_bytes() // 1024} KB stored")
 
     def create_palette_editor(self):
         self.palette_dock = QDockWidget("Palette", self)
-        self.palette_table = QTableWidget()
-        self.palette_table.setColumnCount(2)
-        self.palette_table.setHorizontalHeaderLabels(["Index", "Color"])
-        self.palette_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.palette_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.palette_table.cellDoubleClicked.connect(self.edit_palette_color)
-        self.palette_table.cellClicked.connect(self.select_palette_color)
+        self.palette_model = PaletteModel(self)
+        self.palette_table = QTableView()
+        self.palette_table.setModel(self.palette_model)
+        for header in (self.palette_table.horizontalHeader(), self.palette_table.verticalHeader()):
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+            header.setDefaultSectionSize(SWATCH_SIZE)
+            header.setMinimumSectionSize(SWATCH_SIZE)
+        self.palette_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.palette_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.palette_table.doubleClicked.connect(self.edit_palette_color)
+        self.palette_table.clicked.connect(self.select_palette_color)
         self.palette_dock.setWidget(self.palette_table)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.palette_dock)
 
@@ -526,53 +1811,192 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getOpenFileName(self, "Open Image", "",
                                               "TIM (*.tim);;Image Files (*.png *.jpg *.bmp)")
         if not path: return
-        if path.lower().endswith(".tim"):
-            try:
-                info = load_tim(path)
-            except Exception as e:
-                print("Error:", e); return
-            self.image_info = info; self.current_file = path
-            if info['clut'] is not None and info['bpp'] in (4, 8):
-                self.palette_mode = True; self.brush_index = 0
-                self.populate_palette_table(); self.palette_dock.show()
+        self.open_file_from_path(path)
+
+    def create_layer_panel(self):
+        self.layers = None      # None until a second layer is added; then image_info['data'] is the composite cache
+        self.active_layer = 0
+        self._composite_rect = None
+        self._canvas_rect = None
+        self._canvas_image = None
+        self.layer_dock = QDockWidget("Layers", self)
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        layout.setContentsMargins(0, 0, 0, 0)
+        bar = QToolBar(panel)
+        for text, slot in (("Add", self.add_layer), ("Remove", self.remove_layer),
+                           ("Properties", self.edit_layer_properties), ("Flatten", self.flatten_layers)):
+            act = QAction(text, self)
+            act.triggered.connect(slot)
+            bar.addAction(act)
+        self.layer_list = QListWidget()
+        self.layer_list.currentRowChanged.connect(self._on_layer_selected)
+        self.layer_list.itemChanged.connect(self._on_layer_item_changed)
+        layout.addWidget(bar)
+        layout.addWidget(self.layer_list)
+        self.layer_dock.setWidget(panel)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.layer_dock)
+
+    def _indexed(self):
+        return self.image_info['bpp'] in (4, 8) and bool(self.image_info.get('clut'))
+
+    def _refresh_layer_list(self):
+        self.layer_list.blockSignals(True)
+        self.layer_list.clear()
+        for i, layer in reversed(list(enumerate(self.layers or []))):
+            if i == 0:
+                detail = ""
+            elif self._indexed():
+                detail = f" (key {layer['transparent']})"
             else:
-                self.palette_mode = False; self.palette_dock.hide()
+                detail = f" ({layer['opacity']}%)"
+            item = QListWidgetItem(layer['name'] + detail)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if layer['visible'] else Qt.CheckState.Unchecked)
+            self.layer_list.addItem(item)
+        if self.layers:
+            self.layer_list.setCurrentRow(len(self.layers) - 1 - self.active_layer)
+        self.layer_list.blockSignals(False)
+
+    def _on_layer_selected(self, row):
+        if self.layers and row >= 0:
+            self.active_layer = len(self.layers) - 1 - row
+
+    def _on_layer_item_changed(self, item):
+        if not self.layers:
+            return
+        layer = self.layers[len(self.layers) - 1 - self.layer_list.row(item)]
+        visible = item.checkState() == Qt.CheckState.Checked
+        if layer['visible'] != visible:
+            layer['visible'] = visible
+            self._invalidate_composite()
             self.update_canvas()
+
+    def add_layer(self):
+        if not self.image_info:
+            return
+        w = self.image_info['width']; h = self.image_info['height']
+        if not self.layers:
+            base = new_layer("Background", 0, 0)
+            base['data'] = [list(row) for row in self.image_info['data']]
+            self.layers = [base]
+        if self._indexed():
+            layer = new_layer(f"Layer {len(self.layers)}", w, h, fill=0, transparent=0)
         else:
-            try:
-                pil_img = Image.open(path).convert("RGBA")
-            except Exception as e:
-                print("Error:", e); return
-            width, height = pil_img.size
-            pixels = list(pil_img.getdata())
-            rows = []
-            for y in range(height):
-                row = []
-                for x in range(width):
-                    r, g, b, a = pixels[y*width + x]
-                    row.append((r, g, b))
-                rows.append(row)
-            self.image_info = {'bpp':24, 'clut':None, 'data':rows, 'width':width, 'height':height}
-            self.current_file = path; self.palette_mode = False; self.palette_dock.hide()
-            self.update_canvas()
+            layer = new_layer(f"Layer {len(self.layers)}", w, h)
+        self.layers.append(layer)
+        self.active_layer = len(self.layers) - 1
+        self._refresh_layer_list()
+        self.layer_dock.show()
+
+    def remove_layer(self):
+        if not self.layers or self.active_layer == 0:
+            return  # the background layer stays
+        del self.layers[self.active_layer]
+        self.active_layer -= 1
+        self._invalidate_composite()
+        if len(self.layers) == 1:
+            self.flatten_layers()
+        else:
+            self._refresh_layer_list()
+        self.update_canvas()
+
+    def edit_layer_properties(self):
+        if not self.layers:
+            return
+        layer = self.layers[self.active_layer]
+        if self._indexed():
+            if self.active_layer == 0:
+                return  # the background is always opaque
+            value, ok = QInputDialog.getInt(self, "Layer Properties", "Transparent CLUT index:",
+                                            layer['transparent'], 0, len(self.image_info['clut']) - 1)
+            if not ok:
+                return
+            # Keep untouched pixels empty: they hold the old key, so move them to the new one
+            old_key = layer['transparent']
+            if value != old_key:
+                for row in layer['data']:
+                    for x, idx in enumerate(row):
+                        if idx == old_key:
+                            row[x] = value
+            layer['transparent'] = value
+        else:
+            value, ok = QInputDialog.getInt(self, "Layer Properties", "Opacity (%):", layer['opacity'], 0, 100)
+            if not ok:
+                return
+            layer['opacity'] = value
+        self._invalidate_composite()
+        self._refresh_layer_list()
+        self.update_canvas()
+
+    def flatten_layers(self):
+        if not self.layers:
+            return
+        self._flush_composite()
+        self.layers = None; self.active_layer = 0
+        self._refresh_layer_list()
+
+    def _invalidate_composite(self):
+        w = self.image_info['width']; h = self.image_info['height']
+        self._dirty_rect = union_rect(self._dirty_rect, 0, 0, w, h)
+        self._composite_rect = (0, 0, w, h)
+        self._invalidate_canvas()
+
+    def _invalidate_canvas(self):
+        self._canvas_rect = (0, 0, self.image_info['width'], self.image_info['height'])
+
+    def _flush_composite(self):
+        """Bring the cached composite (image_info['data']) up to date inside the dirty rectangle."""
+        if self.layers and self._composite_rect:
+            composite_layers(self.layers, self.image_info['data'], self._composite_rect, self._indexed())
+        self._composite_rect = None
+
+    def _edit_rows(self):
+        """Rows that painting tools write to: the active layer, or the image itself."""
+        if self.layers:
+            return self.layers[self.active_layer]['data']
+        return self.image_info['data']
+
+    def _edit_value(self, x, y):
+        if not (0 <= x < self.image_info['width'] and 0 <= y < self.image_info['height']):
+            return None
+        return self._edit_rows()[y][x]
+
+    def _erase_index(self):
+        if self.layers and self.active_layer > 0:
+            return self.layers[self.active_layer]['transparent']
+        return 0
 
     def update_canvas(self):
         if not self.image_info: return
         w = self.image_info['width']; h = self.image_info['height']
-        img = QImage(w, h, QImage.Format.Format_ARGB32)
-        img.fill(Qt.GlobalColor.transparent)
+        if self._canvas_image is None or self._canvas_image.size() != QSize(w, h):
+            self._canvas_image = QImage(w, h, QImage.Format.Format_ARGB32)
+            self._canvas_image.fill(Qt.GlobalColor.transparent)
+            self._invalidate_canvas()
+        self._flush_composite()
+        if self._canvas_rect is None:
+            return
+        x0, y0, x1, y1 = self._canvas_rect
+        self._canvas_rect = None
+        img = self._canvas_image
+        data = self.image_info['data']
         if self.palette_mode and self.image_info['clut']:
             pal = self.image_info['clut']
-            for y, row in enumerate(self.image_info['data']):
-                for x, idx in enumerate(row):
+            for y in range(y0, y1):
+                row = data[y]
+                for x in range(x0, x1):
+                    idx = row[x]
                     if 0 <= idx < len(pal):
                         r, g, b = pal[idx]
                     else:
                         r, g, b = 0, 0, 0
                     img.setPixelColor(x, y, QColor(r, g, b, 255))
         else:
-            for y, row in enumerate(self.image_info['data']):
-                for x, pixel in enumerate(row):
+            for y in range(y0, y1):
+                row = data[y]
+                for x in range(x0, x1):
+                    pixel = row[x]
                     if isinstance(pixel, tuple):
                         r, g, b = pixel
                     else:
@@ -598,29 +2022,23 @@ class MainWindow(QMainWindow):
                 self.brush_index = best_idx
 
     def populate_palette_table(self):
-        pal = self.image_info['clut'] or []
-        count = len(pal)
-        self.palette_table.setRowCount(count)
-        for i, (r, g, b) in enumerate(pal):
-            idx_item = QTableWidgetItem(str(i))
-            color_item = QTableWidgetItem()
-            color_item.setBackground(QColor(r, g, b))
-            self.palette_table.setItem(i, 0, idx_item)
-            self.palette_table.setItem(i, 1, color_item)
-
-    def select_palette_color(self, row, col):
-        if col == 1:
-            self.brush_index = row
-
-    def edit_palette_color(self, row, col):
-        if col == 1 and self.image_info.get('clut', None):
-            old = self.image_info['clut'][row]
+        self.palette_model.set_clut(self.image_info['clut'])
+
+    def select_palette_color(self, index):
+        entry = self.palette_model.entry_index(index)
+        if entry < len(self.palette_model.clut):
+            self.brush_index = entry
+
+    def edit_palette_color(self, index):
+        entry = self.palette_model.entry_index(index)
+        if self.image_info.get('clut', None) and entry < len(self.image_info['clut']):
+            old = self.image_info['clut'][entry]
             initial = QColor(old[0], old[1], old[2])
             color = QColorDialog.getColor(initial, self, "Edit Palette Color")
             if color.isValid():
-                self.image_info['clut'][row] = (color.red(), color.green(), color.blue())
-                item = self.palette_table.item(row, 1)
-                if item: item.setBackground(color)
+                self.palette_model.set_color(entry, (color.red(), color.green(), color.blue()))
+                self._clut_dirty = True
+                self._invalidate_canvas()
                 self.update_canvas()
 
     def on_canvas_mouse_press(self, pos):
@@ -630,14 +2048,13 @@ class MainWindow(QMainWindow):
             if self.palette_mode:   self.set_index(x, y, self.brush_index)
             else:                  self.set_color(x, y, self.brush_color)
         elif self.current_tool == 'eraser':
-            if self.palette_mode:   self.set_index(x, y, 0)
+            if self.palette_mode:   self.set_index(x, y, self._erase_index())
             else:                  self.set_color(x, y, self.eraser_color)
         elif self.current_tool == 'fill':
+            tgt = self._edit_value(x, y)
             if self.palette_mode:
-                tgt = self.get_index(x, y)
                 self.flood_fill_index(x, y, tgt, self.brush_index)
             else:
-                tgt = self.get_color(x, y)
                 self.flood_fill_color(x, y, tgt, self.brush_color)
         elif self.current_tool == 'picker':
             if self.palette_mode:   self.brush_index = self.get_index(x, y)
@@ -658,7 +2075,7 @@ class MainWindow(QMainWindow):
                 if self.palette_mode:   self.set_index(xi, yi, self.brush_index)
                 else:                  self.set_color(xi, yi, self.brush_color)
             elif self.current_tool == 'eraser':
-                if self.palette_mode:   self.set_index(xi, yi, 0)
+                if self.palette_mode:   self.set_index(xi, yi, self._erase_index())
                 else:                  self.set_color(xi, yi, self.eraser_color)
         self.update_canvas()
         self.last_pos = (x, y)
@@ -668,11 +2085,16 @@ class MainWindow(QMainWindow):
 
     def set_color(self, x, y, color):
         if 0 <= x < self.image_info['width'] and 0 <= y < self.image_info['height']:
-            self.image_info['data'][y][x] = (color.red(), color.green(), color.blue())
+            value = (color.red(), color.green(), color.blue())
+            if color.alpha() == 0 and self.layers and self.active_layer > 0:
+                value = None  # erasing on an overlay layer reveals the layers below
+            self._edit_rows()[y][x] = value
+            self._mark_dirty(x, y)
 
     def set_index(self, x, y, idx):
         if 0 <= x < self.image_info['width'] and 0 <= y < self.image_info['height']:
-            self.image_info['data'][y][x] = idx
+            self._edit_rows()[y][x] = idx
+            self._mark_dirty(x, y)
 
     def get_color(self, x, y):
         if not (0 <= x < self.image_info['width'] and 0 <= y < self.image_info['height']):
@@ -690,142 +2112,86 @@ class MainWindow(QMainWindow):
         return self.image_info['data'][y][x]
 
     def flood_fill_color(self, x, y, target_color, new_color):
+        """target_color may be a QColor, an (r,g,b) tuple or None (an empty layer pixel)."""
         width = self.image_info['width']; height = self.image_info['height']
-        tgt = (target_color.red(), target_color.green(), target_color.blue())
+        rows = self._edit_rows()
+        if target_color is None or isinstance(target_color, tuple):
+            tgt = target_color
+        else:
+            tgt = (target_color.red(), target_color.green(), target_color.blue())
         rep = (new_color.red(), new_color.green(), new_color.blue())
         if tgt == rep: return
         visited = set(); stack = [(x,y)]
         while stack:
             px, py = stack.pop()
             if (px,py) in visited or not (0<=px<width and 0<=py<height): continue
-            pix = self.image_info['data'][py][px]
-            curr = pix if isinstance(pix, tuple) else (pix.red(), pix.green(), pix.blue())
+            pix = rows[py][px]
+            curr = pix if pix is None or isinstance(pix, tuple) else (pix.red(), pix.green(), pix.blue())
             if curr == tgt:
-                self.image_info['data'][py][px] = rep
+                rows[py][px] = rep
+                self._mark_dirty(px, py)
                 visited.add((px,py))
                 stack.extend([(px+1,py),(px-1,py),(px,py+1),(px,py-1)])
 
     def flood_fill_index(self, x, y, target_idx, new_idx):
         width = self.image_info['width']; height = self.image_info['height']
+        rows = self._edit_rows()
         if target_idx == new_idx: return
         visited = set(); stack = [(x,y)]
         while stack:
             px, py = stack.pop()
             if (px,py) in visited or not (0<=px<width and 0<=py<height): continue
-            if self.image_info['data'][py][px] == target_idx:
-                self.image_info['data'][py][px] = new_idx
+            if rows[py][px] == target_idx:
+                rows[py][px] = new_idx
+                self._mark_dirty(px, py)
                 visited.add((px,py))
                 stack.extend([(px+1,py),(px-1,py),(px,py+1),(px,py-1)])
 
-    def _get_rgb_from_pixel(self, pix):
-        """Helper method to extract RGB values from pixel data"""
-        if self.palette_mode and self.image_info.get('clut'):
-            # For palette mode, pix is an index
-            if isinstance(pix, int) and 0 <= pix < len(self.image_info['clut']):
-                return self.image_info['clut'][pix]
-            else:
-                return (0, 0, 0)  # Default color for invalid index
-        elif isinstance(pix, tuple):
-            # Direct RGB tuple
-            return pix
-        elif hasattr(pix, 'red'):
-            # QColor object
-            return (pix.red(), pix.green(), pix.blue())
-        else:
-            # Fallback
-            return (0, 0, 0)
-
     def save_file(self):
         if not self.current_file:
             self.save_file_as()
             return
-        if self.current_file.lower().endswith(".tim"):
-            save_tim(self.current_file, self.image_info)
-        else:
-            fmt = self.current_file.split('.')[-1].upper()
-            img = QImage(self.image_info['width'], self.image_info['height'], QImage.Format.Format_ARGB32)
-            for y,row in enumerate(self.image_info['data']):
-                for x,pix in enumerate(row):
-                    r, g, b = self._get_rgb_from_pixel(pix)
-                    img.setPixelColor(x,y, QColor(r,g,b))
-            img.save(self.current_file, fmt)
+        self.queue_save(self.current_file)
 
     def save_file_as(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save As", "", 
                                               "TIM (*.tim);;PNG (*.png);;BMP (*.bmp);;JPEG (*.jpg)")
         if not path: return
-        if path.lower().endswith(".tim"):
-            if self.image_info['clut'] is None and self.image_info['bpp'] == 24:
-                bpp = prompt_tim_bpp(self)
-                if bpp is None: return
-                pil_img = Image.new("RGB", (self.image_info['width'], self.image_info['height']))
-                for y, row in enumerate(self.image_info['data']):
-                    for x, pix in enumerate(row):
-                        pil_img.putpixel((x, y), pix)
-                if bpp == 4:
-                    pil_img = pil_img.convert("P", palette=Image.Palette.ADAPTIVE, colors=16)
-                    pal = pil_img.getpalette()[:48]  # 16 colors * 3 channels
-                    clut = [(pal[i], pal[i+1], pal[i+2]) for i in range(0, 48, 3)]
-                    data = []
-                    for y in range(pil_img.height):
-                        row = []
-                        for x in range(pil_img.width):
-                            row.append(pil_img.getpixel((x, y)))
-                        data.append(row)
-                    info = {'bpp': 4, 'clut': clut, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-                elif bpp == 8:
-                    pil_img = pil_img.convert("P", palette=Image.Palette.ADAPTIVE, colors=256)
-                    pal = pil_img.getpalette()[:768]  # 256 colors * 3 channels
-                    clut = [(pal[i], pal[i+1], pal[i+2]) for i in range(0, 768, 3)]
-                    data = []
-                    for y in range(pil_img.height):
-                        row = []
-                        for x in range(pil_img.width):
-                            row.append(pil_img.getpixel((x, y)))
-                        data.append(row)
-                    info = {'bpp': 8, 'clut': clut, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-                elif bpp == 16:
-                    data = []
-                    for y in range(pil_img.height):
-                        row = []
-                        for x in range(pil_img.width):
-                            r, g, b = pil_img.getpixel((x, y))
-                            row.append((r, g, b))
-                        data.append(row)
-                    info = {'bpp': 16, 'clut': None, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-                else: # 24bpp
-                    data = []
-                    for y in range(pil_img.height):
-                        row = []
-                        for x in range(pil_img.width):
-                            r, g, b = pil_img.getpixel((x, y))
-                            row.append((r, g, b))
-                        data.append(row)
-                    info = {'bpp': 24, 'clut': None, 'data': data, 'width': pil_img.width, 'height': pil_img.height}
-                save_tim(path, info)
-            else:
-                save_tim(path, self.image_info)
-        else:
-            fmt = path.split('.')[-1].upper()
-            img = QImage(self.image_info['width'], self.image_info['height'], QImage.Format.Format_ARGB32)
-            for y,row in enumerate(self.image_info['data']):
-                for x,pix in enumerate(row):
-                    r, g, b = self._get_rgb_from_pixel(pix)
-                    img.setPixelColor(x,y, QColor(r,g,b))
-            img.save(path, fmt)
+        bpp = None
+        if path.lower().endswith(".tim") and self.image_info['clut'] is None and self.image_info['bpp'] == 24:
+            bpp = prompt_tim_bpp(self)
+            if bpp is None: return
+        # Switch first so the save counts as covering the current edits; the journal
+        # is only dropped once it has finished (_on_save_finished)
         self.current_file = path
+        self._watch_current_file(path)
+        self.queue_save(path, bpp=bpp)
 
     def export_png(self):
         path, _ = QFileDialog.getSaveFileName(self, "Export to PNG", "", "PNG (*.png)")
         if not path: return
-        img = QImage(self.image_info['width'], self.image_info['height'], QImage.Format.Format_ARGB32)
-        for y,row in enumerate(self.image_info['data']):
-            for x,pix in enumerate(row):
-                r, g, b = self._get_rgb_from_pixel(pix)
-                img.setPixelColor(x,y, QColor(r,g,b))
-        img.save(path, "PNG")
+        self.queue_save(path)
+
+def _rebuild_cli(folder):
+    """Headless `--rebuild <folder>`: run the incremental rebuild with the saved config."""
+    cfg = load_config()
+    command = cfg.get("rebuild_command")
+    if not command:
+        print("No rebuild_command configured in", _config_path())
+        return 2
+    cache = ConversionCache(max_bytes=cfg.get("cache_max_mb", DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)) * 1024 * 1024)
+    result = run_texture_rebuild(folder, command, cache, int(cfg.get("rebuild_default_bpp", 8)),
+                                 cfg.get("rebuild_timeout_seconds", 600))
+    log_path = append_build_log(result)
+    print(f"changed {len(result['changed'])}, converted {len(result['converted'])}, "
+          f"exit {result['returncode']} (log: {log_path})")
+    return result['returncode'] or 0
 
 if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--rebuild":
+        # A core app gives QStandardPaths the same config dir the GUI uses
+        core_app = QCoreApplication(sys.argv)
+        sys.exit(_rebuild_cli(sys.argv[2]))
     app = QApplication(sys.argv)
     win = MainWindow()
     win.resize(1500,1000)
@@ -0,0 +1,41 @@
+"""
+Stand-in for the GTVolTools "Make GT2 VOL from Directory" step, so the rebuild
+pipeline can be exercised on machines without GTVolTools (e.g. Linux).
+
+Usage: python rebuild_stub.py <folder> [changed_file]
+
+Writes <folder>.vol.txt listing every file in the tree with its size, and
+prints the changed TIMs listed (one per line) in changed_file.
+"""
+import os
+import sys
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    folder = os.path.abspath(argv[1])
+    if not os.path.isdir(folder):
+        print(f"not a folder: {folder}", file=sys.stderr)
+        return 1
+    changed = []
+    if len(argv) > 2:
+        with open(argv[2], "r", encoding="utf-8") as f:
+            changed = [line.strip() for line in f if line.strip()]
+    listing = []
+    for root, _, names in os.walk(folder):
+        for name in sorted(names):
+            full = os.path.join(root, name)
+            listing.append(f"{os.path.relpath(full, folder)}\t{os.path.getsize(full)}")
+    out_path = folder.rstrip(os.sep) + ".vol.txt"
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(sorted(listing)) + "\n")
+    for rel in changed:
+        print("changed:", rel)
+    print(f"wrote {out_path} ({len(listing)} files)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
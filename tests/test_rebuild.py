@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ppainter
+
+STUB_COMMAND = ["{python}", "{app_dir}/rebuild_stub.py", "{folder}", "{changed_file}"]
+
+
+@pytest.fixture
+def vol(tmp_path, monkeypatch):
+    monkeypatch.setattr(ppainter, "_config_dir", lambda: str(tmp_path / "config"))
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "vol" / "carwheel"
+    folder.mkdir(parents=True)
+    Image.new("RGB", (16, 8), (255, 0, 0)).save(folder / "wheel.png")
+    Image.new("RGB", (8, 8), (0, 0, 255)).save(folder / "hub.png")
+    return tmp_path
+
+
+def test_rebuild_relative_folder_runs_stub(vol):
+    result = ppainter.run_texture_rebuild("vol", STUB_COMMAND)
+    assert result['returncode'] == 0, result['stderr']
+    assert result['changed'] == ["carwheel/hub.tim", "carwheel/wheel.tim"]
+    assert "changed: carwheel/wheel.tim" in result['stdout']
+    # The stub writes next to the folder, not inside it
+    listing = (vol / "vol.vol.txt").read_text()
+    assert "wheel.tim" in listing
+    assert not (vol / "vol" / "vol.vol.txt").exists()
+    assert ppainter.read_tim_bpp(str(vol / "vol" / "carwheel" / "wheel.tim")) == 8
+
+    assert ppainter.run_texture_rebuild("vol", STUB_COMMAND)['command'] is None
+
+
+def test_rebuild_only_changed_source(vol):
+    ppainter.run_texture_rebuild("vol", STUB_COMMAND)
+    wheel = vol / "vol" / "carwheel" / "wheel.png"
+    Image.new("RGB", (16, 8), (0, 255, 0)).save(wheel)
+    tim = wheel.with_suffix(".tim")
+    os.utime(wheel, (os.path.getmtime(tim) + 10,) * 2)
+    result = ppainter.run_texture_rebuild("vol", STUB_COMMAND)
+    assert result['returncode'] == 0
+    assert result['converted'] == ["carwheel/wheel.png"]
+    assert result['changed'] == ["carwheel/wheel.tim"]
+
+
+def test_invalid_sibling_tim_uses_default_bpp(vol):
+    hub = vol / "vol" / "carwheel" / "hub.png"
+    tim = hub.with_suffix(".tim")
+    tim.write_bytes(b"not a tim")
+    os.utime(tim, (os.path.getmtime(hub) - 10,) * 2)
+    result = ppainter.run_texture_rebuild("vol", STUB_COMMAND, default_bpp=16)
+    assert result['returncode'] == 0
+    assert "carwheel/hub.png" in result['converted']
+    assert ppainter.read_tim_bpp(str(tim)) == 16
+
+
+def test_failed_command_is_retried(vol):
+    result = ppainter.run_texture_rebuild("vol", ["{python}", "-c", "raise SystemExit(3)"])
+    assert result['returncode'] == 3
+    result = ppainter.run_texture_rebuild("vol", STUB_COMMAND)
+    assert result['returncode'] == 0
+    assert result['changed'] == ["carwheel/hub.tim", "carwheel/wheel.tim"]